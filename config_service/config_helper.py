@@ -1,7 +1,22 @@
 import os
 import json
+import shutil
 
 from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    # orjson is an optional, faster replacement for the json module
+    import orjson
+except ImportError:
+    orjson = None
+
+# marks a property that is not present in the configuration
+_SENTINEL = object()
+
+# default filename_character_maps
+WINDOWS_FILENAME_MAP = {'\\': '＼', '/': '／', ':': '꞉', '?': '？', '*': '＊', '<': '＜', '>': '＞', '|': '｜', '"': '＂'}
+LINUX_FILENAME_MAP = {'/': '|'}
 
 
 class ConfigHelper:
@@ -13,6 +28,11 @@ class ConfigHelper:
         self._whole_config = {}
         self.config_path = str(Path(storage_path) / 'config.json')
 
+        # while a batch is open, changes are only marked as dirty and
+        # written to disk once the batch is closed
+        self._in_batch = False
+        self._dirty = False
+
     def is_present(self) -> bool:
         # Tests if a configuration file exists
         return os.path.isfile(self.config_path)
@@ -20,32 +40,100 @@ class ConfigHelper:
     def load(self):
         # Opens the configuration file and parse it to a JSON object
         try:
-            with open(self.config_path, 'r') as f:
-                config_raw = f.read()
-                self._whole_config = json.loads(config_raw)
-        except IOError:
+            if orjson is not None:
+                with open(self.config_path, 'rb') as f:
+                    self._whole_config = orjson.loads(f.read())
+            else:
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    self._whole_config = json.load(f)
+        except FileNotFoundError:
             raise ValueError('No config found!')
 
     def _save(self):
-        # Saves the JSON object back to file
-        with open(self.config_path, 'w+', encoding='utf-8') as f:
-            config_formatted = json.dumps(self._whole_config, indent=4)
+        # Saves the JSON object back to file, deferred if a batch is open
+        if self._in_batch:
+            self._dirty = True
+            return
+
+        self._write()
+
+    def _write(self):
+        # Writes the JSON object to a temporary file and atomically
+        # replaces the configuration file with it, so that an interrupted
+        # write never leaves an empty or partial config behind
+        # a symlinked config is resolved, so that its target gets replaced
+        config_path = os.path.realpath(self.config_path)
+        tmp_path = config_path + '.tmp'
+        if orjson is not None:
+            config_formatted = orjson.dumps(self._whole_config, option=orjson.OPT_INDENT_2)
+        else:
+            config_formatted = json.dumps(self._whole_config, indent=4).encode('utf-8')
+
+        # the config contains credentials, so it is only readable by the owner
+        tmp_fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(tmp_fd, 'wb', buffering=1 << 16) as f:
             f.write(config_formatted)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # keep the permissions of an existing config
+        if os.path.isfile(config_path):
+            shutil.copymode(config_path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, config_path)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups multiple changes of the configuration, so that the
+        configuration file is only written once at the end of the batch.
+        """
+        if self._in_batch:
+            # nested batches are merged into the outer one
+            yield self
+            return
+
+        self._in_batch = True
+        try:
+            yield self
+        finally:
+            self._in_batch = False
+            if self._dirty:
+                self._dirty = False
+                self._write()
 
     def get_property(self, key: str) -> any:
         # returns a property if configured
-        try:
-            return self._whole_config[key]
-        except KeyError:
+        if key not in self._whole_config:
             raise ValueError('The %s-Property is not yet configured!' % (key))
+        return self._whole_config[key]
+
+    def _get(self, key: str, default: any) -> any:
+        # returns a property or the default if it is not configured
+        return self._whole_config.get(key, default)
 
     def set_property(self, key: str, value: any):
         # sets a property in the JSON object
-        self._whole_config.update({key: value})
+        current_value = self._whole_config.get(key, _SENTINEL)
+        # a dict or list passed in again may have been changed in place
+        if current_value == value and (current_value is not value or not isinstance(value, (dict, list))):
+            return
+
+        self._whole_config[key] = value
         self._save()
 
+    def set_properties(self, properties: {str: any}):
+        # sets multiple properties in the JSON object and saves them at once
+        with self.batch():
+            for key, value in properties.items():
+                self.set_property(key, value)
+
     def remove_property(self, key):
         # removes a property from the JSON object
+        if key not in self._whole_config:
+            return
+
         self._whole_config.pop(key, None)
         #                           ^ behavior if the key is not present
         self._save()
@@ -53,109 +141,85 @@ class ConfigHelper:
     def set_default_filename_character_map(self, default_windows_map: bool):
         # Sets the default filename_character_map for Windows or Empty
         if default_windows_map:
-            windows_map = {'\\': '＼', '/': '／', ':': '꞉', '?': '？', '*': '＊', '<': '＜', '>': '＞', '|': '｜', '"': '＂'}
-
-            self.set_property("filename_character_map", windows_map)
+            self.set_property('filename_character_map', dict(WINDOWS_FILENAME_MAP))
         else:
-            linux_map = {'/': '|'}
-            self.set_property("filename_character_map", linux_map)
+            self.set_property('filename_character_map', dict(LINUX_FILENAME_MAP))
 
     # ---------------------------- GETTERS ------------------------------------
 
     def get_download_submissions(self) -> str:
         # returns a stored boolean if submissions should be downloaded
-        try:
-            return self.get_property('download_submissions')
-        except ValueError:
-            return False
+        return self._get('download_submissions', False)
 
     def get_download_descriptions(self) -> bool:
         # returns a stored boolean if descriptions should be downloaded
-        try:
-            return self.get_property('download_descriptions')
-        except ValueError:
-            return False
+        return self._get('download_descriptions', False)
 
     def get_download_databases(self) -> bool:
         # returns a stored boolean if databases should be downloaded
-        try:
-            return self.get_property('download_databases')
-        except ValueError:
-            return False
+        return self._get('download_databases', False)
 
     def get_download_course_ids(self) -> str:
         # returns a stored list of course ids hat should be downloaded
-        try:
-            return self.get_property('download_course_ids')
-        except ValueError:
-            return []
+        return self._get('download_course_ids', [])
 
     def get_token(self) -> str:
         # returns a stored token
-        try:
-            return self.get_property('token')
-        except ValueError:
+        value = self._get('token', _SENTINEL)
+        if value is _SENTINEL:
             raise ValueError('Not yet configured!')
+        return value
 
     def get_moodle_domain(self) -> str:
         # returns a stored moodle_domain
-        try:
-            return self.get_property('moodle_domain')
-        except ValueError:
+        value = self._get('moodle_domain', _SENTINEL)
+        if value is _SENTINEL:
             raise ValueError('Not yet configured!')
+        return value
 
     def get_moodle_path(self) -> str:
         # returns a stored moodle_path
-        try:
-            return self.get_property('moodle_path')
-        except ValueError:
+        value = self._get('moodle_path', _SENTINEL)
+        if value is _SENTINEL:
             raise ValueError('Not yet configured!')
+        return value
 
     def get_options_of_courses(self) -> str:
         # returns a stored dictionary of options for courses
-        try:
-            return self.get_property('options_of_courses')
-        except ValueError:
-            return {}
+        return self._get('options_of_courses', {})
 
     def get_dont_download_course_ids(self) -> str:
         # returns a stored list of ids that should not be downloaded
-        try:
-            return self.get_property('dont_download_course_ids')
-        except ValueError:
-            return []
+        return self._get('dont_download_course_ids', [])
 
     def get_download_linked_files(self) -> {}:
         # returns if linked files should be downloaded
-        try:
-            return self.get_property('download_linked_files')
-        except ValueError:
-            return False
+        return self._get('download_linked_files', False)
 
     def get_download_options(self) -> {}:
         # returns the option dictionary for downloading files
-        options = {}
-        try:
-            options.update({'download_linked_files': self.get_property('download_linked_files')})
-        except ValueError:
-            options.update({'download_linked_files': False})
-
-        try:
-            options.update({'download_domains_whitelist': self.get_property('download_domains_whitelist')})
-        except ValueError:
-            options.update({'download_domains_whitelist': []})
-
-        try:
-            options.update({'download_domains_blacklist': self.get_property('download_domains_blacklist')})
-        except ValueError:
-            options.update({'download_domains_blacklist': []})
-
-        return options
+        defaults = {
+            'download_linked_files': False,
+            'download_domains_whitelist': [],
+            'download_domains_blacklist': [],
+        }
+        return {key: self._get(key, default) for key, default in defaults.items()}
 
     def get_filename_character_map(self) -> {}:
         # returns the filename_character_map for PathTools
-        try:
-            return self.get_property('filename_character_map')
-        except ValueError:
+        if 'filename_character_map' not in self._whole_config:
             self.set_default_filename_character_map(True)
-            return self.get_property('filename_character_map')
+        return self._whole_config['filename_character_map']
+
+    def get_filename_translation_table(self) -> {}:
+        # returns the filename_character_map as a table for str.translate,
+        # or None if the map replaces sequences longer than one character
+        # or if a replacement contains a replaced character, because the
+        # replacements are then chained by PathTools
+        filename_character_map = self.get_filename_character_map()
+        if any(len(char) != 1 for char in filename_character_map):
+            return None
+        for replacement in filename_character_map.values():
+            if any(char in filename_character_map for char in replacement):
+                return None
+        return str.maketrans(filename_character_map)
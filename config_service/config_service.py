@@ -36,20 +36,23 @@ class ConfigService:
         except (RequestRejectedError, ValueError, RuntimeError) as error:
             raise RuntimeError('Error while communicating with the Moodle System! (%s)' % (error))
 
-        self._select_courses_to_download(courses)
-        self._set_options_of_courses(courses)
-        self._select_should_download_submissions()
-        self._select_should_download_descriptions()
-        self._select_should_download_databases()
-        self._select_should_download_linked_files()
-
-    def _select_courses_to_download(self, courses: [Course]):
+        # all changes are written to the config file at once
+        with self.config_helper.batch():
+            courses_to_download = self._select_courses_to_download(courses)
+            self._set_options_of_courses(courses_to_download)
+            self._select_should_download_submissions()
+            self._select_should_download_descriptions()
+            self._select_should_download_databases()
+            self._select_should_download_linked_files()
+
+    def _select_courses_to_download(self, courses: [Course]) -> [Course]:
         """
         Asks the user for the courses that should be downloaded.
         @param courses: All available courses
+        @return: The courses that will be downloaded
         """
-        download_course_ids = self.config_helper.get_download_course_ids()
-        dont_download_course_ids = self.config_helper.get_dont_download_course_ids()
+        download_course_ids = frozenset(self.config_helper.get_download_course_ids())
+        dont_download_course_ids = frozenset(self.config_helper.get_dont_download_course_ids())
 
         print('')
         Log.info(
@@ -58,35 +61,38 @@ class ConfigService:
         )
         print('')
 
-        choices = []
-        defaults = []
-        for i, course in enumerate(courses):
-            choices.append(('%5i\t%s' % (course.id, course.fullname)))
-
-            if ResultsHandler._should_download_course(course.id, download_course_ids, dont_download_course_ids):
-                defaults.append(i)
+        choices = [f'{course.id:5d}\t{course.fullname}' for course in courses]
+        defaults = [
+            i
+            for i, course in enumerate(courses)
+            if ResultsHandler._should_download_course(course.id, download_course_ids, dont_download_course_ids)
+        ]
 
         Log.special('Which of the courses should be downloaded?')
         Log.info('[You can select with the space bar and confirm your selection with the enter key]')
         print('')
         selected_courses = cutie.select_multiple(options=choices, ticked_indices=defaults)
 
-        download_course_ids = []
-        for i, course in enumerate(courses):
-            if i in selected_courses:
-                download_course_ids.append(course.id)
+        selected_indices = set(selected_courses)
+        selected_course_list = [course for i, course in enumerate(courses) if i in selected_indices]
+
+        download_course_ids = [course.id for course in selected_course_list]
 
         self.config_helper.set_property('download_course_ids', download_course_ids)
 
         self.config_helper.remove_property('dont_download_course_ids')
 
+        # an empty selection means that all courses are downloaded
+        if len(selected_course_list) == 0:
+            return courses
+
+        return selected_course_list
+
     def _set_options_of_courses(self, courses: [Course]):
         """
         Let the user set special options for every single course
+        @param courses: The courses that will be downloaded
         """
-        download_course_ids = self.config_helper.get_download_course_ids()
-        dont_download_course_ids = self.config_helper.get_dont_download_course_ids()
-
         print('')
         Log.info(
             'You can set special settings for every single course.\n'
@@ -97,45 +103,12 @@ class ConfigService:
         )
         print('')
 
-        while True:
-
-            choices = []
-            choices_courses = []
-
-            options_of_courses = self.config_helper.get_options_of_courses()
-
-            choices.append('None')
-
-            for course in courses:
-                if ResultsHandler._should_download_course(course.id, download_course_ids, dont_download_course_ids):
-
-                    current_course_settings = options_of_courses.get(str(course.id), None)
-
-                    # create default settings
-                    if current_course_settings is None:
-                        current_course_settings = {
-                            'original_name': course.fullname,
-                            'overwrite_name_with': None,
-                            'create_directory_structure': True,
-                        }
-
-                    # create list of options
-                    overwrite_name_with = current_course_settings.get('overwrite_name_with', None)
+        # _change_settings_of updates this dictionary in place
+        options_of_courses = self.config_helper.get_options_of_courses()
 
-                    create_directory_structure = current_course_settings.get('create_directory_structure', True)
+        choices = ['None'] + [self._course_option_line(course, options_of_courses) for course in courses]
 
-                    if overwrite_name_with is not None and overwrite_name_with != course.fullname:
-                        choices.append(
-                            (
-                                '%5i\t%s (%s) cfs=%s'
-                                % (course.id, overwrite_name_with, course.fullname, create_directory_structure)
-                            )
-                        )
-
-                    else:
-                        choices.append(('%5i\t%s  cfs=%s' % (course.id, course.fullname, create_directory_structure)))
-
-                    choices_courses.append(course)
+        while True:
 
             print('')
             Log.special('For which of the following course do you want to change the settings?')
@@ -146,15 +119,37 @@ class ConfigService:
             if selected_course == 0:
                 break
             else:
-                self._change_settings_of(choices_courses[selected_course - 1], options_of_courses)
+                course = courses[selected_course - 1]
+                if self._change_settings_of(course, options_of_courses):
+                    # only the line of the changed course needs to be updated
+                    choices[selected_course] = self._course_option_line(course, options_of_courses)
+
+    @staticmethod
+    def _course_option_line(course: Course, options_of_courses: {}) -> str:
+        """
+        Formats the line that represents a course and its settings
+        in the selection of _set_options_of_courses
+        """
+        current_course_settings = options_of_courses.get(str(course.id), {})
 
-    def _change_settings_of(self, course: Course, options_of_courses: {}):
+        overwrite_name_with = current_course_settings.get('overwrite_name_with', None)
+
+        create_directory_structure = current_course_settings.get('create_directory_structure', True)
+
+        if overwrite_name_with is not None and overwrite_name_with != course.fullname:
+            return f'{course.id:5d}\t{overwrite_name_with} ({course.fullname}) cfs={create_directory_structure}'
+
+        return f'{course.id:5d}\t{course.fullname}  cfs={create_directory_structure}'
+
+    def _change_settings_of(self, course: Course, options_of_courses: {}) -> bool:
         """
         Ask for a new Name for the course.
         Then asks if a file structure should be created.
+        @return: True if the settings of the course have been changed
         """
 
-        current_course_settings = options_of_courses.get(str(course.id), None)
+        course_key = str(course.id)
+        current_course_settings = options_of_courses.get(course_key, None)
 
         # create default settings
         if current_course_settings is None:
@@ -178,7 +173,7 @@ class ConfigService:
             overwrite_name_with != course.fullname
             and current_course_settings.get('overwrite_name_with', None) != overwrite_name_with
         ):
-            current_course_settings.update({'overwrite_name_with': overwrite_name_with})
+            current_course_settings['overwrite_name_with'] = overwrite_name_with
             changed = True
 
         # Ask if a file structure should be created
@@ -191,12 +186,14 @@ class ConfigService:
 
         if create_directory_structure is not current_course_settings.get('create_directory_structure', True):
             changed = True
-            current_course_settings.update({'create_directory_structure': create_directory_structure})
+            current_course_settings['create_directory_structure'] = create_directory_structure
 
         if changed:
-            options_of_courses.update({str(course.id): current_course_settings})
+            options_of_courses[course_key] = current_course_settings
             self.config_helper.set_property('options_of_courses', options_of_courses)
 
+        return changed
+
     def _select_should_download_submissions(self):
         """
         Asks the user if submissions should be downloaded
@@ -9,6 +9,8 @@ class PathTools:
     """A set of methodes to create correct paths."""
 
     filename_character_map = {}
+    # the filename_character_map as str.translate table, if possible
+    filename_translation_table = None
 
     @staticmethod
     def to_valid_name(name: str) -> str:
@@ -25,9 +27,12 @@ class PathTools:
         name = html.unescape(name)
 
         # Forward and Backward Slashes are not good for filenames
-        for char in PathTools.filename_character_map:
-            replacement = PathTools.filename_character_map[char]
-            name = name.replace(char, replacement)
+        if PathTools.filename_translation_table is not None:
+            name = name.translate(PathTools.filename_translation_table)
+        else:
+            for char in PathTools.filename_character_map:
+                replacement = PathTools.filename_character_map[char]
+                name = name.replace(char, replacement)
 
         if os.path.sep not in PathTools.filename_character_map:
             name = name.replace(os.path.sep, '／')
@@ -218,6 +218,7 @@ def run_main(storage_path, skip_cert_verify=False, without_downloading_files=Fal
     console_service = ConsoleService(config)
 
     PathTools.filename_character_map = config.get_filename_character_map()
+    PathTools.filename_translation_table = config.get_filename_translation_table()
 
     try:
         if not IS_DEBUG:
@@ -1,17 +1,21 @@
 import sys
+import math
 import shutil
 import logging
+import threading
 
 from pathlib import Path
 from getpass import getpass
-from urllib.parse import urlparse
+from urllib.parse import urlsplit, SplitResult
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 
 from utils import cutie
 from config_service.config_helper import ConfigHelper
+from state_recorder.file import File
 from state_recorder.course import Course
 from state_recorder.state_recorder import StateRecorder
 from moodle_connector import login_helper
-from moodle_connector import sso_token_receiver
 from moodle_connector.results_handler import ResultsHandler
 from moodle_connector.databases_handler import DatabasesHandler
 from moodle_connector.assignments_handler import AssignmentsHandler
@@ -20,6 +24,11 @@ from moodle_connector.request_helper import RequestRejectedError, RequestHelper
 
 
 class MoodleService:
+    # How many requests for course contents are sent at the same time
+    fetch_thread_count = 5
+    # How many courses are fetched with one request at most
+    fetch_batch_size = 50
+
     def __init__(self, config_helper: ConfigHelper, storage_path: str, skip_cert_verify: bool = False):
         self.config_helper = config_helper
         self.storage_path = storage_path
@@ -40,7 +49,7 @@ class MoodleService:
             if not use_stored_url:
                 moodle_url = input('URL of Moodle:   ')
 
-                moodle_uri = urlparse(moodle_url)
+                moodle_uri = urlsplit(moodle_url)
 
                 moodle_domain, moodle_path = self._split_moodle_uri(moodle_uri)
 
@@ -62,9 +71,9 @@ class MoodleService:
                 print('Error while communicating with the Moodle System! (%s) Please try again.' % (error))
 
         # Saves the created token and the successful Moodle parameters.
-        self.config_helper.set_property('token', moodle_token)
-        self.config_helper.set_property('moodle_domain', moodle_domain)
-        self.config_helper.set_property('moodle_path', moodle_path)
+        self.config_helper.set_properties(
+            {'token': moodle_token, 'moodle_domain': moodle_domain, 'moodle_path': moodle_path}
+        )
 
         return moodle_token
 
@@ -74,11 +83,14 @@ class MoodleService:
         Moodle-System and saves it.
         @return: The Token for Moodle.
         """
+        # imported here because it pulls in http.server, which is only needed for SSO
+        from moodle_connector import sso_token_receiver
+
         if not use_stored_url:
 
             moodle_url = input('URL of Moodle:   ')
 
-            moodle_uri = urlparse(moodle_url)
+            moodle_uri = urlsplit(moodle_url)
 
             moodle_domain, moodle_path = self._split_moodle_uri(moodle_uri)
 
@@ -102,24 +114,16 @@ class MoodleService:
 
         print('Please log into Moodle on this computer and then visit the following address in your web browser: ')
 
+        launch_url = (
+            f'https://{moodle_domain}{moodle_path}admin/tool/mobile/launch.php'
+            '?service=moodle_mobile_app&passport=12345'
+        )
+
         if do_automatic:
-            print(
-                'https://'
-                + moodle_domain
-                + moodle_path
-                + 'admin/tool/mobile/launch.php?service='
-                + 'moodle_mobile_app&passport=12345&'
-                + 'urlscheme=http%3A%2F%2Flocalhost'
-            )
+            print(f'{launch_url}&urlscheme=http%3A%2F%2Flocalhost')
             moodle_token = sso_token_receiver.receive_token()
         else:
-            print(
-                'https://'
-                + moodle_domain
-                + moodle_path
-                + 'admin/tool/mobile/launch.php?service='
-                + 'moodle_mobile_app&passport=12345'
-            )
+            print(launch_url)
 
             print(
                 'If you open the link in the browser, no web page should'
@@ -148,9 +152,9 @@ class MoodleService:
                 raise ValueError('Invalid URL!')
 
         # Saves the created token and the successful Moodle parameters.
-        self.config_helper.set_property('token', moodle_token)
-        self.config_helper.set_property('moodle_domain', moodle_domain)
-        self.config_helper.set_property('moodle_path', moodle_path)
+        self.config_helper.set_properties(
+            {'token': moodle_token, 'moodle_domain': moodle_domain, 'moodle_path': moodle_path}
+        )
 
         return moodle_token
 
@@ -169,78 +173,115 @@ class MoodleService:
 
         request_helper = RequestHelper(moodle_domain, moodle_path, token, self.skip_cert_verify)
         first_contact_handler = FirstContactHandler(request_helper)
-        results_handler = ResultsHandler(request_helper)
 
-        download_course_ids = self.config_helper.get_download_course_ids()
-        dont_download_course_ids = self.config_helper.get_dont_download_course_ids()
+        # sets allow constant time lookups in _should_download_course
+        download_course_ids = frozenset(self.config_helper.get_download_course_ids())
+        dont_download_course_ids = frozenset(self.config_helper.get_dont_download_course_ids())
         download_submissions = self.config_helper.get_download_submissions()
         download_descriptions = self.config_helper.get_download_descriptions()
         download_databases = self.config_helper.get_download_databases()
 
         courses = []
-        filtered_courses = []
         try:
 
             sys.stdout.write('\rDownloading account information')
             sys.stdout.flush()
 
             userid, version = first_contact_handler.fetch_userid_and_version()
+            logging.debug('Detected moodle version: %d' % (version))
             assignments_handler = AssignmentsHandler(request_helper, version)
-            databases_handler = DatabasesHandler(request_helper, version)
-            results_handler.setVersion(version)
+            # the databases are fetched in parallel, so they need their own connection
+            databases_handler = DatabasesHandler(
+                RequestHelper(moodle_domain, moodle_path, token, self.skip_cert_verify), version
+            )
 
             courses_list = first_contact_handler.fetch_courses(userid)
-            courses = []
             # Filter unselected courses
-            for course in courses_list:
-                if ResultsHandler._should_download_course(course.id, download_course_ids, dont_download_course_ids):
-                    courses.append(course)
-
-            assignments = assignments_handler.fetch_assignments(courses)
-
-            databases = {}
+            courses = [
+                course
+                for course in courses_list
+                if ResultsHandler._should_download_course(course.id, download_course_ids, dont_download_course_ids)
+            ]
+
+            # fetch_databases writes a status line, so it runs before the
+            # assignments are fetched and their progress is written
             databases = databases_handler.fetch_databases(courses)
-            if download_databases:
-                databases = databases_handler.fetch_database_files(databases)
-
-            if download_submissions:
-                assignments = assignments_handler.fetch_submissions(userid, assignments)
-
-            index = 0
-            for course in courses:
-                index += 1
-
-                # to limit the output to one line
-                limits = shutil.get_terminal_size()
-
-                shorted_course_name = course.fullname
-                if len(course.fullname) > 17:
-                    shorted_course_name = course.fullname[:15] + '..'
-
-                into = '\rDownloading course information'
 
-                status_message = into + ' %3d/%3d [%17s|%6s]' % (index, len(courses), shorted_course_name, course.id)
-
-                if len(status_message) > limits.columns:
-                    status_message = status_message[0 : limits.columns]
-
-                sys.stdout.write(status_message)
-                sys.stdout.flush()
-
-                course_assignments = assignments.get(course.id, {})
-                course_databases = databases.get(course.id, {})
-                results_handler.set_fetch_addons(course_assignments, course_databases)
-                results_handler.set_fetch_options(download_descriptions)
-                course.files = results_handler.fetch_files(course.id)
-
-                filtered_courses.append(course)
+            # the database files are fetched (without console output) in a
+            # background thread, while the slower submissions are fetched in
+            # this thread, so that they can be interrupted immediately
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                if download_databases:
+                    databases_future = executor.submit(databases_handler.fetch_database_files, databases)
+
+                assignments = assignments_handler.fetch_assignments(courses)
+                if download_submissions:
+                    assignments = assignments_handler.fetch_submissions(userid, assignments)
+
+                if download_databases:
+                    databases = databases_future.result()
+
+            # Every thread gets its own connection to the Moodle system
+            thread_data = threading.local()
+
+            def fetch_files_of(course_batch: [Course]) -> [[File]]:
+                results_handler = getattr(thread_data, 'results_handler', None)
+                if results_handler is None:
+                    results_handler = ResultsHandler(
+                        RequestHelper(moodle_domain, moodle_path, token, self.skip_cert_verify)
+                    )
+                    results_handler.setVersion(version)
+                    results_handler.set_fetch_options(download_descriptions)
+                    thread_data.results_handler = results_handler
+
+                course_ids = [course.id for course in course_batch]
+                return results_handler.fetch_files_of_courses(course_ids, assignments, databases)
+
+            # spread the courses over all threads, but not more than fetch_batch_size per request
+            batch_size = min(self.fetch_batch_size, max(1, math.ceil(len(courses) / self.fetch_thread_count)))
+            course_batches = [courses[i : i + batch_size] for i in range(0, len(courses), batch_size)]
+
+            total = len(courses)
+
+            # to limit the output to one line
+            limits = shutil.get_terminal_size()
+
+            with ThreadPoolExecutor(max_workers=self.fetch_thread_count) as executor:
+                futures = [executor.submit(fetch_files_of, course_batch) for course_batch in course_batches]
+                fetched_files = chain.from_iterable(future.result() for future in futures)
+
+                try:
+                    index = 0
+                    for course, files in zip(courses, fetched_files):
+                        index += 1
+
+                        name = course.fullname
+                        shorted_course_name = name if len(name) <= 17 else name[:15] + '..'
+
+                        status_message = 'Downloading course information %3d/%3d [%17s|%6s]' % (
+                            index,
+                            total,
+                            shorted_course_name,
+                            course.id,
+                        )
+
+                        # \033[K clears the rest of the line
+                        sys.stdout.write('\r' + status_message[0 : limits.columns - 1] + '\033[K')
+                        sys.stdout.flush()
+
+                        course.files = files
+                except BaseException:
+                    # on errors or Ctrl-C only wait for the batches that are already running
+                    for future in futures:
+                        future.cancel()
+                    raise
             print('')
 
         except (RequestRejectedError, ValueError, RuntimeError) as error:
             raise RuntimeError('Error while communicating with the Moodle System! (%s)' % (error))
 
         logging.debug('Checking for changes...')
-        changes = self.recorder.changes_of_new_version(filtered_courses)
+        changes = self.recorder.changes_of_new_version(courses)
 
         # Filter changes
         changes = self._filter_courses(
@@ -272,8 +313,8 @@ class MoodleService:
     @staticmethod
     def _filter_courses(
         changes: [Course],
-        download_course_ids: [int],
-        dont_download_course_ids: [int],
+        download_course_ids: {int},
+        dont_download_course_ids: {int},
         download_submissions: bool,
         download_descriptions: bool,
         download_databases: bool,
@@ -281,9 +322,9 @@ class MoodleService:
         """
         Filters the changes course list from courses that
         should not get downloaded
-        @param download_course_ids: list of course ids
+        @param download_course_ids: set of course ids
                                          that should be downloaded
-        @param dont_download_course_ids: list of course ids
+        @param dont_download_course_ids: set of course ids
                                          that should not be downloaded
         @param download_submissions: boolean if submissions
                                     should be downloaded
@@ -293,29 +334,20 @@ class MoodleService:
         @return: filtered changes course list
         """
 
+        # content types of files that should not be downloaded
+        excluded_content_types = set()
+        if not download_submissions:
+            excluded_content_types.add('submission_file')
+        if not download_descriptions:
+            excluded_content_types.add('description')
+        if not download_databases:
+            excluded_content_types.add('database_file')
+
         filtered_changes = []
 
         for course in changes:
-            if not download_submissions:
-                course_files = []
-                for file in course.files:
-                    if file.content_type != 'submission_file':
-                        course_files.append(file)
-                course.files = course_files
-
-            if not download_descriptions:
-                course_files = []
-                for file in course.files:
-                    if file.content_type != 'description':
-                        course_files.append(file)
-                course.files = course_files
-
-            if not download_databases:
-                course_files = []
-                for file in course.files:
-                    if file.content_type != 'database_file':
-                        course_files.append(file)
-                course.files = course_files
+            if len(excluded_content_types) > 0:
+                course.files = [file for file in course.files if file.content_type not in excluded_content_types]
 
             if (
                 ResultsHandler._should_download_course(course.id, download_course_ids, dont_download_course_ids)
@@ -326,7 +358,7 @@ class MoodleService:
         return filtered_changes
 
     @staticmethod
-    def _split_moodle_uri(moodle_uri: str):
+    def _split_moodle_uri(moodle_uri: SplitResult):
         """
         Splits a given Moodle-Uri into the domain and the installation path
         @return: moodle_domain, moodle_path as strings
@@ -4,6 +4,7 @@ import json
 import urllib
 import certifi
 
+from functools import lru_cache
 from http.client import HTTPSConnection
 
 
@@ -25,16 +26,24 @@ class RequestHelper:
         """
         Opens a connection to the Moodle system
         """
-        if skip_cert_verify:
-            context = ssl._create_unverified_context()
-        else:
-            context = ssl.create_default_context(cafile=certifi.where())
+        context = self._get_ssl_context(skip_cert_verify)
         self.connection = HTTPSConnection(moodle_domain, context=context)
 
         self.token = token
         self.moodle_domain = moodle_domain
         self.moodle_path = moodle_path
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_ssl_context(skip_cert_verify: bool) -> ssl.SSLContext:
+        """
+        Creates the SSL context for the connections. It is shared by all
+        RequestHelpers, so the certificates are only loaded once.
+        """
+        if skip_cert_verify:
+            return ssl._create_unverified_context()
+        return ssl.create_default_context(cafile=certifi.where())
+
     def post_REST(self, function: str, data: {str: str} = None) -> object:
         """
         Sends a POST request to the REST endpoint of the Moodle system
@@ -61,6 +70,46 @@ class RequestHelper:
         response = self.connection.getresponse()
         return self._initial_parse(response)
 
+    def post_REST_multiple(self, calls: [(str, {str: str})]) -> [object]:
+        """
+        Sends multiple Web service calls in one POST request to the REST
+        endpoint of the Moodle system (available since Moodle 3.7)
+        @param calls: A list of tuples of the Web service function to be
+                      called and its optional data.
+        @return: A list of the JSON responses of the calls, in the same
+                 order as the calls, already checked for errors.
+        """
+
+        requests = {}
+        for index, (function, data) in enumerate(calls):
+            requests[str(index)] = {
+                'function': function,
+                'arguments': json.dumps(data if data is not None else {}),
+                'settingfilter': 1,
+                'settingfileurl': 1,
+            }
+
+        result = self.post_REST('tool_mobile_call_external_functions', {'requests': requests})
+
+        responses = []
+        for response in result.get('responses', []):
+            if response.get('error', False):
+                exception = json.loads(response.get('exception') or '{}')
+                raise RequestRejectedError(
+                    'The Moodle System rejected the Request.'
+                    + ' Details: %s (Errorcode: %s, Message: %s)'
+                    % (exception.get('exception', ''), exception.get('errorcode', ''), exception.get('message', ''))
+                )
+            responses.append(json.loads(response.get('data') or 'null'))
+
+        if len(responses) != len(calls):
+            raise RuntimeError(
+                'Invalid response received from the Moodle System! Expected %d responses, got %d.'
+                % (len(calls), len(responses))
+            )
+
+        return responses
+
     @staticmethod
     def _get_REST_POST_URL(moodle_path: str, function: str) -> str:
         """
@@ -1,5 +1,4 @@
 import re
-import logging
 import hashlib
 
 from moodle_connector.request_helper import RequestHelper
@@ -19,12 +18,11 @@ class ResultsHandler:
     def setVersion(self, version: int):
         self.version = version
 
-        logging.debug('Detected moodle version: %d' % (version))
-
     @staticmethod
     def _should_download_course(course_id: int, download_course_ids: [int], dont_download_course_ids: [int]) -> bool:
         """
-        Checks if a course is in White-list and not in Blacklist
+        Checks if a course is in White-list and not in Blacklist.
+        Pass the id lists as sets to make the lookups constant time.
         """
         inBlacklist = course_id in dont_download_course_ids
         inWhitelist = course_id in download_course_ids or len(download_course_ids) == 0
@@ -241,3 +239,34 @@ class ResultsHandler:
         files = self._get_files_in_sections(course_sections)
 
         return files
+
+    def fetch_files_of_courses(
+        self, course_ids: [int], assignments: {int: {int: {}}}, databases: {int: {int: {}}}
+    ) -> [[File]]:
+        """
+        Queries the Moodle system for all the files that are present in
+        multiple courses, using one request for all courses if possible
+        @param course_ids: The ids of the courses for which you want to enquirer.
+        @param assignments: The assignments of all courses, indexed by course id
+        @param databases: The databases of all courses, indexed by course id
+        @return: A list of Files for every course, in the order of course_ids
+        """
+
+        # do this only if version is greater then 3.7
+        # because tool_mobile_call_external_functions is not available before
+        if self.version < 2019052000:
+            files_of_courses = []
+            for course_id in course_ids:
+                self.set_fetch_addons(assignments.get(course_id, {}), databases.get(course_id, {}))
+                files_of_courses.append(self.fetch_files(course_id))
+            return files_of_courses
+
+        calls = [('core_course_get_contents', {'courseid': course_id}) for course_id in course_ids]
+        responses = self.request_helper.post_REST_multiple(calls)
+
+        files_of_courses = []
+        for course_id, course_sections in zip(course_ids, responses):
+            self.set_fetch_addons(assignments.get(course_id, {}), databases.get(course_id, {}))
+            files_of_courses.append(self._get_files_in_sections(course_sections))
+
+        return files_of_courses
@@ -1,9 +1,19 @@
+import sys
 import logging
 
 from utils.logger import Log
+from state_recorder.file import File
 from state_recorder.course import Course
 from notification_services.notification_service import NotificationService
 
+# ANSI escape sequences used for the terminal output
+_RESET = '\033[0m'
+_GREEN = '\033[1;32m'
+_YELLOW = '\033[1;33m'
+_BLUE = '\033[1;34m'
+_MAGENTA = '\033[1;35m'
+_CYAN = '\033[1;36m'
+
 
 class ConsoleService(NotificationService):
     def interactively_configure(self) -> None:
@@ -14,54 +24,51 @@ class ConsoleService(NotificationService):
         Creates a terminal output about the downloaded changes.
         @param changes: A list of changed courses with changed files.
         """
-        RESET_SEQ = '\033[0m'
-        COLOR_SEQ = '\033[1;%dm'
-
-        BLACK, RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, WHITE = range(30, 38)
         print('\n')
 
-        diff_count = 0
-        for course in changes:
-            diff_count += len(course.files)
+        diff_count = sum(len(course.files) for course in changes)
 
         if diff_count > 0:
             logging.info('%s changes found for the configured Moodle-Account.' % (diff_count))
 
             Log.success('%s changes found for the configured Moodle-Account.' % (diff_count))
 
+        # the output is collected and written at once
+        output = []
         for course in changes:
             if len(course.files) == 0:
                 continue
 
-            print(COLOR_SEQ % BLUE + course.fullname + RESET_SEQ)
+            output.append(f'{_BLUE}{course.fullname}{_RESET}\n')
 
             for file in course.files:
-                if file.modified:
-                    print(COLOR_SEQ % YELLOW + '≠\t' + file.saved_to + RESET_SEQ)
-
-                elif file.moved:
-                    if file.new_file is not None:
-                        print(
-                            COLOR_SEQ % CYAN
-                            + '<->\t'
-                            + (
-                                file.saved_to
-                                + RESET_SEQ
-                                + COLOR_SEQ % GREEN
-                                + ' ==> '
-                                + file.new_file.saved_to
-                                + RESET_SEQ
-                            )
-                        )
-                    else:
-                        print(COLOR_SEQ % CYAN + '<->\t' + file.saved_to + RESET_SEQ)
-
-                elif file.deleted:
-                    print(COLOR_SEQ % MAGENTA + '-\t' + file.saved_to + RESET_SEQ)
-
-                else:
-                    print(COLOR_SEQ % GREEN + '+\t' + file.saved_to + RESET_SEQ)
-            print('\n')
+                output.append(self._format_file_change(file))
+            output.append('\n\n')
+
+        sys.stdout.write(''.join(output))
+        sys.stdout.flush()
+
+    @staticmethod
+    def _format_file_change(file: File) -> str:
+        """
+        Creates the colored terminal line for a changed file.
+        @param file: A changed file
+        @return: The line, terminated by a newline
+        """
+        if file.modified:
+            return f'{_YELLOW}≠\t{file.saved_to}{_RESET}\n'
+
+        elif file.moved:
+            if file.new_file is not None:
+                return f'{_CYAN}<->\t{file.saved_to}{_RESET}{_GREEN} ==> {file.new_file.saved_to}{_RESET}\n'
+            else:
+                return f'{_CYAN}<->\t{file.saved_to}{_RESET}\n'
+
+        elif file.deleted:
+            return f'{_MAGENTA}-\t{file.saved_to}{_RESET}\n'
+
+        else:
+            return f'{_GREEN}+\t{file.saved_to}{_RESET}\n'
 
     def notify_about_error(self, error_description: str):
         raise RuntimeError('Not yet implemented!')
@@ -22,8 +22,8 @@ class OfflineService:
 
         stored_files = self.state_recorder.get_stored_files()
 
-        download_course_ids = self.config_helper.get_download_course_ids()
-        dont_download_course_ids = self.config_helper.get_dont_download_course_ids()
+        download_course_ids = frozenset(self.config_helper.get_download_course_ids())
+        dont_download_course_ids = frozenset(self.config_helper.get_dont_download_course_ids())
         download_submissions = self.config_helper.get_download_submissions()
         download_descriptions = self.config_helper.get_download_descriptions()
         download_databases = self.config_helper.get_download_databases()